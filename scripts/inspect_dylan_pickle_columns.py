@@ -1,16 +1,78 @@
 import argparse
 import pickle
+from collections import Counter
 from pathlib import Path
 
+from variant_embeddings.pickle_inspection.payload_globals import payload_stubs
+from variant_embeddings.pickle_inspection.schema_cache import (
+    load_schema_cache,
+    pickle_fingerprint,
+    write_schema_cache,
+)
 
-def iter_rows(pkl_path: Path, max_rows: int) -> list[object]:
+
+_READ_BUFFER_SIZE = 1 << 20
+
+class _Opaque:
+    """Stand-in for an array/tensor whose payload was skipped."""
+
+    def __setstate__(self, state):
+        pass
+
+
+def _skip_payload(*args, **kwargs) -> _Opaque:
+    return _Opaque()
+
+
+# Column enumeration only needs row keys, so the globals that rebuild array/tensor payloads are
+# stubbed out. Scalars and dtypes load normally: numpy scalar keys must keep their value and hash.
+_PAYLOAD_GLOBALS = payload_stubs(
+    {
+        "reconstruct": _skip_payload,
+        "frombuffer": _skip_payload,
+        "tensor": _skip_payload,
+        "parameter": _skip_payload,
+        "storage": _skip_payload,
+    }
+)
+
+
+class _KeysOnlyUnpickler(pickle.Unpickler):
+    def find_class(self, module: str, name: str):
+        stub = _PAYLOAD_GLOBALS.get((module, name))
+        if stub is not None:
+            return stub
+        return super().find_class(module, name)
+
+
+def iter_rows(pkl_path: Path, max_rows: int, stable_rows: int = 0) -> list[object]:
+    """Read up to max_rows records.
+
+    If stable_rows > 0, stop early once that many consecutive dict rows have shown only
+    key sets already seen (the column union can no longer grow from repeats).
+    """
     rows: list[object] = []
-    with pkl_path.open("rb") as f:
-        while len(rows) < max_rows:
-            try:
-                rows.append(pickle.load(f))
-            except EOFError:
-                break
+    seen_shapes: set[frozenset] = set()
+    streak = 0
+    append = rows.append
+    with pkl_path.open("rb", buffering=_READ_BUFFER_SIZE) as f:
+        try:
+            for _ in range(max_rows):
+                # One unpickler per record: each record was dumped with a fresh memo, and a reused
+                # C Unpickler keeps numbering memo entries from the previous record.
+                obj = _KeysOnlyUnpickler(f).load()
+                append(obj)
+                if stable_rows and isinstance(obj, dict):
+                    shape = frozenset(obj.keys())
+                    if shape in seen_shapes:
+                        streak += 1
+                        if streak >= stable_rows:
+                            break
+                    else:
+                        seen_shapes.add(shape)
+                        streak = 0
+        except EOFError:
+            pass
     return rows
 
 
@@ -31,14 +93,11 @@ def summarize_columns_from_rows(rows: list[object]) -> dict:
     numeric_named = [c for c in cols if isinstance(c, (int, float))]
     string_cols = sorted([c for c in cols if isinstance(c, str)])
 
-    prefix_buckets: dict[str, int] = {}
-    for c in string_cols:
-        prefix = c.split("_")[0] if "_" in c else c
-        prefix_buckets[prefix] = prefix_buckets.get(prefix, 0) + 1
-
-    top_prefixes = sorted(prefix_buckets.items(), key=lambda x: x[1], reverse=True)[:10]
+    prefix_buckets = Counter(c.split("_", 1)[0] for c in string_cols)
+    top_prefixes = prefix_buckets.most_common(10)
 
     return {
+        "rows_sampled": len(rows),
         "total_columns": len(cols),
         "string_columns": string_cols,
         "numeric_named_columns_count": len(numeric_named),
@@ -51,15 +110,36 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Inspect Dylan Tan line-by-line pickle columns")
     parser.add_argument("--path", required=True, help="Path to .pkl file")
     parser.add_argument("--max-rows", type=int, default=200, help="Max rows to sample")
+    parser.add_argument(
+        "--stable-rows",
+        type=int,
+        default=50,
+        help="Stop after this many consecutive rows add no new key set (0 = read all --max-rows)",
+    )
     parser.add_argument("--max-cols-print", type=int, default=200, help="Max string columns to print fully")
+    parser.add_argument(
+        "--schema-cache",
+        default=None,
+        help=(
+            "JSON file to reuse/store the summary; reused only for the same --path file "
+            "(path, size, mtime) and the same sampling options"
+        ),
+    )
     args = parser.parse_args()
 
     p = Path(args.path)
-    rows = iter_rows(p, max_rows=args.max_rows)
-    s = summarize_columns_from_rows(rows)
+    cache_path = Path(args.schema_cache) if args.schema_cache else None
+    params = {"max_rows": args.max_rows, "stable_rows": args.stable_rows, **pickle_fingerprint(p)}
+
+    s = load_schema_cache(cache_path, params) if cache_path else None
+    if s is None:
+        rows = iter_rows(p, max_rows=args.max_rows, stable_rows=args.stable_rows)
+        s = summarize_columns_from_rows(rows)
+        if cache_path:
+            write_schema_cache(cache_path, params, s)
 
     print(f"=== {p.name} ===")
-    print(f"Rows sampled: {len(rows)}")
+    print(f"Rows sampled: {s['rows_sampled']}")
     print(f"Total columns: {s['total_columns']}")
     print(f"Numeric-named columns (count): {s['numeric_named_columns_count']}")
     if s["numeric_named_columns_count"]:
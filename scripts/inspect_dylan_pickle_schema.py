@@ -3,10 +3,20 @@
 import argparse
 import math
 import pickle
+import sys
 from collections import Counter
 from pathlib import Path
 from typing import Any
 
+from variant_embeddings.pickle_inspection.payload_globals import payload_stubs
+from variant_embeddings.pickle_inspection.schema_cache import (
+    load_schema_cache,
+    pickle_fingerprint,
+    write_schema_cache,
+)
+
+_READ_BUFFER_SIZE = 1 << 20
+
 # Check if a value is NaN
 def is_nan(value: Any) -> bool:
     try:
@@ -34,39 +44,108 @@ def safe_shape(value: Any) -> str | None:
 
     return None
 
+_TYPE_NAMES: dict[type, str] = {}
+
+# type(value).__name__, looked up once per distinct type
+def type_name(value: Any) -> str:
+    t = type(value)
+    name = _TYPE_NAMES.get(t)
+    if name is None:
+        name = _TYPE_NAMES[t] = t.__name__
+    return name
+
+# str(k) for a dict key, computed and interned once per distinct key; str keys pass through.
+# The cache is split by type so that equal-hashing keys like 1, 1.0 and True keep distinct names.
+def key_name(k: Any, cache: dict[type, dict[Any, str]]) -> str:
+    t = type(k)
+    if t is str:
+        return k
+    names = cache.get(t)
+    if names is None:
+        names = cache[t] = {}
+    name = names.get(k)
+    if name is None:
+        name = names[k] = sys.intern(str(k))
+    return name
+
+class ShapeProxy:
+    """Stand-in for an unpickled array/tensor that keeps its shape and drops the payload."""
+
+    __slots__ = ("shape",)
+
+    def __init__(self, shape: tuple | None = None) -> None:
+        self.shape = shape
+
+    def __setstate__(self, state: Any) -> None:
+        # ndarray state: (version, shape, dtype, is_fortran, rawdata)
+        if isinstance(state, tuple) and len(state) == 5:
+            self.shape = tuple(state[1])
+
+# One proxy subclass per original type name, so type_name() still reports ndarray/Tensor/...
+_PROXY_TYPES = {
+    name: type(name, (ShapeProxy,), {"__slots__": ()})
+    for name in ("ndarray", "Tensor", "Parameter")
+}
+
+def _rebuild_ndarray(*args: Any) -> ShapeProxy:
+    return _PROXY_TYPES["ndarray"]()
+
+def _frombuffer_ndarray(buf: Any, dtype: Any, shape: Any, *args: Any) -> ShapeProxy:
+    return _PROXY_TYPES["ndarray"](tuple(shape))
+
+def _rebuild_tensor(storage: Any, storage_offset: Any, size: Any, *args: Any) -> ShapeProxy:
+    return _PROXY_TYPES["Tensor"](tuple(size))
+
+def _rebuild_parameter(data: Any, *args: Any) -> ShapeProxy:
+    return _PROXY_TYPES["Parameter"](getattr(data, "shape", None))
+
+def _skip_storage(*args: Any) -> None:
+    return None
+
+# Pickle globals that would materialize array/tensor data, mapped to shape-only replacements
+_SHAPE_ONLY_GLOBALS = payload_stubs(
+    {
+        "reconstruct": _rebuild_ndarray,
+        "frombuffer": _frombuffer_ndarray,
+        "tensor": _rebuild_tensor,
+        "parameter": _rebuild_parameter,
+        "storage": _skip_storage,
+    }
+)
+
+# Unpickler that turns arrays/tensors into ShapeProxy objects instead of loading their data
+class ShapeOnlyUnpickler(pickle.Unpickler):
+    def find_class(self, module: str, name: str) -> Any:
+        stub = _SHAPE_ONLY_GLOBALS.get((module, name))
+        if stub is not None:
+            return stub
+        return super().find_class(module, name)
+
 # Read up to max_rows objects from a pickle file
 def read_rows(pkl_path: Path, max_rows: int) -> list[Any]:
     rows: list[Any] = []
-    with pkl_path.open("rb") as f:
-        while len(rows) < max_rows:
-            try:
-                rows.append(pickle.load(f))
-            except EOFError:
-                break
+    append = rows.append
+    with pkl_path.open("rb", buffering=_READ_BUFFER_SIZE) as f:
+        try:
+            for _ in range(max_rows):
+                append(ShapeOnlyUnpickler(f).load())
+        except EOFError:
+            pass
     return rows
 
-# CLI tool that inspects the contents of a pickled dataset (presumably a list of rows) and prints schema-like statistics.
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Inspect Dylan Tan line-by-line pickle schema")
-    parser.add_argument("--path", required=True, help="Path to .pkl file")
-    parser.add_argument("--max-rows", type=int, default=500, help="Max rows to sample")
-    parser.add_argument("--id-samples", type=int, default=10, help="How many ID samples to print")
-    parser.add_argument("--pathogenicity-samples", type=int, default=20, help="How many Pathogenicity samples to print")
-    args = parser.parse_args()
-
-    p = Path(args.path)
-    rows = read_rows(p, max_rows=args.max_rows)
-
+# Gather schema-like statistics from sampled rows into a JSON-serializable summary
+def summarize_rows(rows: list[Any], id_samples: int, pathogenicity_samples: int) -> dict:
     key_union: set[Any] = set()
-    row_types = Counter(type(r).__name__ for r in rows)
+    row_types = Counter(type_name(r) for r in rows)
 
     # If rows are dict-like, gather keys + simple stats
     path_vals: list[Any] = []  # Pathogenicity values
     id_vals: list[Any] = []
-    embedding_types = Counter()  
+    embedding_types = Counter()
     embedding_keys = Counter()
     embedding_36_shapes = Counter()
     missing_counts = Counter()
+    key_names: dict[type, dict[Any, str]] = {}
 
     for r in rows:
         if isinstance(r, dict):   # Dict-like rows
@@ -79,73 +158,125 @@ def main() -> None:
 
             if "Embedding" in r:
                 emb = r.get("Embedding")
-                embedding_types[type(emb).__name__] += 1
+                embedding_types[type_name(emb)] += 1
                 if isinstance(emb, dict):
                     for k in emb.keys():
-                        embedding_keys[str(k)] += 1
+                        embedding_keys[key_name(k, key_names)] += 1
                     if "36" in emb:
                         embedding_36_shapes[safe_shape(emb["36"]) or "<no-shape>"] += 1
 
             for k, v in r.items():
                 if v is None or is_nan(v):
-                    missing_counts[str(k)] += 1
+                    missing_counts[key_name(k, key_names)] += 1
         else:
             # Not dict rows: we can still try to learn something from repr
             pass
 
+    summary: dict[str, Any] = {
+        "rows_sampled": len(rows),
+        "row_types": row_types.most_common(),
+        "keys": sorted([str(k) for k in key_union]),
+        "embedding_types": embedding_types.most_common(),
+        "embedding_keys": embedding_keys.most_common(),
+        "embedding_36_shapes": embedding_36_shapes.most_common(),
+        "missing_counts": missing_counts.most_common(30),
+    }
+    if path_vals:
+        summary["pathogenicity"] = {
+            "value_types": Counter(type_name(v) for v in path_vals).most_common(),
+            "unique_values": Counter(str(v) for v in path_vals).most_common(30),
+            "samples": [repr(v) for v in path_vals[:pathogenicity_samples]],
+        }
+    if id_vals:
+        summary["id"] = {
+            "value_types": Counter(type_name(v) for v in id_vals).most_common(),
+            "samples": [repr(v) for v in id_vals[:id_samples]],
+        }
+    return summary
+
+# CLI tool that inspects the contents of a pickled dataset (presumably a list of rows) and prints schema-like statistics.
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect Dylan Tan line-by-line pickle schema")
+    parser.add_argument("--path", required=True, help="Path to .pkl file")
+    parser.add_argument("--max-rows", type=int, default=500, help="Max rows to sample")
+    parser.add_argument("--id-samples", type=int, default=10, help="How many ID samples to print")
+    parser.add_argument("--pathogenicity-samples", type=int, default=20, help="How many Pathogenicity samples to print")
+    parser.add_argument(
+        "--schema-cache",
+        default=None,
+        help=(
+            "JSON file to reuse/store the summary; reused only for the same --path file "
+            "(path, size, mtime) and the same sampling options"
+        ),
+    )
+    args = parser.parse_args()
+
+    p = Path(args.path)
+    cache_path = Path(args.schema_cache) if args.schema_cache else None
+    params = {
+        "max_rows": args.max_rows,
+        "id_samples": args.id_samples,
+        "pathogenicity_samples": args.pathogenicity_samples,
+        **pickle_fingerprint(p),
+    }
+
+    s = load_schema_cache(cache_path, params) if cache_path else None
+    if s is None:
+        rows = read_rows(p, max_rows=args.max_rows)
+        s = summarize_rows(rows, args.id_samples, args.pathogenicity_samples)
+        if cache_path:
+            write_schema_cache(cache_path, params, s)
+
     print(f"=== {p.name} ===")
-    print(f"Rows sampled: {len(rows)}")
+    print(f"Rows sampled: {s['rows_sampled']}")
     print("Row python types (count):")
-    for t, c in row_types.most_common():
+    for t, c in s["row_types"]:
         print(f"  {t}: {c}")
 
-    if key_union:
-        keys_sorted = sorted([str(k) for k in key_union])
-        print(f"\nUnion of dict keys ({len(keys_sorted)}):")
-        for k in keys_sorted:
+    if s["keys"]:
+        print(f"\nUnion of dict keys ({len(s['keys'])}):")
+        for k in s["keys"]:
             print(f"  {k}")
 
-    if path_vals:
-        uniq = Counter(str(v) for v in path_vals)  # Unique pathogenicity values
-        types = Counter(type(v).__name__ for v in path_vals) # Types of pathogenicity values
+    if "pathogenicity" in s:
+        path = s["pathogenicity"]
         print("\nPathogenicity:")
         print("  Value types:")
-        for t, c in types.most_common():
+        for t, c in path["value_types"]:
             print(f"    {t}: {c}")
         print("  Unique values (top 30):")
-        for v, c in uniq.most_common(30):
+        for v, c in path["unique_values"]:
             print(f"    {v}: {c}")
-        print(f"  Samples (first {min(args.pathogenicity_samples, len(path_vals))}):")  # Print some samples
-        for v in path_vals[: args.pathogenicity_samples]:
-            print(f"    {v!r}")
+        print(f"  Samples (first {len(path['samples'])}):")  # Print some samples
+        for v in path["samples"]:
+            print(f"    {v}")
 
-    if id_vals:
-        id_types = Counter(type(v).__name__ for v in id_vals)  # Types of ID values
+    if "id" in s:
         print("\nID:")
         print("  Value types:")
-        for t, c in id_types.most_common():
+        for t, c in s["id"]["value_types"]:
             print(f"    {t}: {c}")
-        print(f"  Samples (first {min(args.id_samples, len(id_vals))}):")
-        for v in id_vals[: args.id_samples]:
-            print(f"    {v!r}")
+        print(f"  Samples (first {len(s['id']['samples'])}):")
+        for v in s["id"]["samples"]:
+            print(f"    {v}")
 
-    if embedding_types:
+    if s["embedding_types"]:
         print("\nEmbedding:")
         print("  Container types:")
-        for t, c in embedding_types.most_common():
+        for t, c in s["embedding_types"]:
             print(f"    {t}: {c}")
-        if embedding_keys:
+        if s["embedding_keys"]:
             print("  Dict keys (key,count):")
-            for k, c in embedding_keys.most_common():
+            for k, c in s["embedding_keys"]:
                 print(f"    {k}: {c}")
-        if embedding_36_shapes:
+        if s["embedding_36_shapes"]:
             print("  Shapes for Embedding['36']:")
-            for s, c in embedding_36_shapes.most_common():
-                print(f"    {s}: {c}")
+            for shape, c in s["embedding_36_shapes"]:
+                print(f"    {shape}: {c}")
 
-    if missing_counts:
+    if s["missing_counts"]:
         print("\nMissing values (None/NaN) per key (top 30):")
-        for k, c in missing_counts.most_common(30):
+        for k, c in s["missing_counts"]:
             print(f"  {k}: {c}")
 
 
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+# Pickle globals that rebuild numpy array / torch tensor payloads, by the kind of call they make.
+# Inspectors that only need row keys or shapes swap these for cheap stubs (see payload_stubs).
+PAYLOAD_GLOBALS: dict[tuple[str, str], str] = {
+    # _reconstruct(subtype, shape, dtype), then BUILD state (version, shape, dtype, fortran, raw)
+    ("numpy.core.multiarray", "_reconstruct"): "reconstruct",
+    ("numpy._core.multiarray", "_reconstruct"): "reconstruct",
+    # Protocol 5 path for contiguous arrays: _frombuffer(buf, dtype, shape, order)
+    ("numpy.core.numeric", "_frombuffer"): "frombuffer",
+    ("numpy._core.numeric", "_frombuffer"): "frombuffer",
+    # _rebuild_tensor*(storage, storage_offset, size, stride, ...)
+    ("torch._utils", "_rebuild_tensor"): "tensor",
+    ("torch._utils", "_rebuild_tensor_v2"): "tensor",
+    ("torch._utils", "_rebuild_tensor_v3"): "tensor",
+    # _rebuild_parameter(data, requires_grad, backward_hooks)
+    ("torch._utils", "_rebuild_parameter"): "parameter",
+    # _rebuild_from_type_v2(func, new_type, args, state): tensor subclasses
+    ("torch._utils", "_rebuild_from_type_v2"): "from_type",
+    # _load_from_bytes(data): torch.save()d storages
+    ("torch.storage", "_load_from_bytes"): "storage",
+}
+
+
+def _rebuild_from_type(func: Any, new_type: Any, args: tuple, state: Any) -> Any:
+    # func is already resolved to a stub, so just call it and drop the subclass/state
+    return func(*args)
+
+
+def payload_stubs(
+    stubs: dict[str, Callable[..., Any]],
+) -> dict[tuple[str, str], Callable[..., Any]]:
+    """Map every payload global to the stub given for its kind, for use in find_class.
+
+    Every kind except "from_type" (which defers to the stubbed inner call) must be covered, so a
+    global added to PAYLOAD_GLOBALS cannot be left to load its real payload in one inspector.
+    """
+    stubs = {"from_type": _rebuild_from_type, **stubs}
+    missing = set(PAYLOAD_GLOBALS.values()) - stubs.keys()
+    if missing:
+        raise ValueError(f"no stub for payload global kind(s): {', '.join(sorted(missing))}")
+    return {key: stubs[kind] for key, kind in PAYLOAD_GLOBALS.items()}
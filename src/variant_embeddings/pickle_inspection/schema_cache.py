@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+
+def pickle_fingerprint(pkl_path: Path) -> dict:
+    """Identify the exact pickle a summary was built from: resolved path, size and mtime (ns)."""
+    st = pkl_path.stat()
+    return {"path": str(pkl_path.resolve()), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def load_schema_cache(cache_path: Path, params: dict) -> dict | None:
+    """Return the cached summary if it was built with exactly these params (incl. fingerprint).
+
+    A missing, unreadable or foreign cache file (e.g. JSON that is not an object) counts as a miss.
+    """
+    try:
+        payload = json.loads(cache_path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get("params") != params:
+        return None
+    summary = payload.get("summary")
+    return summary if isinstance(summary, dict) else None
+
+
+def write_schema_cache(cache_path: Path, params: dict, summary: dict) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps({"params": params, "summary": summary}))
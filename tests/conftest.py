@@ -0,0 +1,33 @@
+import sys
+import types
+
+import pytest
+
+
+@pytest.fixture
+def stub_module(monkeypatch):
+    """Install an empty module under the given name for the duration of the test."""
+
+    def install(name: str) -> types.ModuleType:
+        module = types.ModuleType(name)
+        monkeypatch.setitem(sys.modules, name, module)
+        return module
+
+    return install
+
+
+@pytest.fixture
+def stub_global():
+    """Decorator factory registering a local function as module.<name>, so pickle can
+    reference it as a global."""
+
+    def for_module(module: types.ModuleType):
+        def register(func):
+            func.__module__ = module.__name__
+            func.__qualname__ = func.__name__
+            setattr(module, func.__name__, func)
+            return func
+
+        return register
+
+    return for_module
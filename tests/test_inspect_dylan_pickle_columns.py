@@ -0,0 +1,30 @@
+import pickle
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import inspect_dylan_pickle_columns as columns  # noqa: E402
+
+
+def test_columns_keeps_numpy_scalar_keys(tmp_path, stub_module, stub_global):
+    stub_module("numpy")
+    stub_module("numpy.core")
+    multiarray = stub_module("numpy.core.multiarray")
+
+    class float64(float):
+        def __reduce__(self):
+            return scalar, ("f8", float(self))
+
+    @stub_global(multiarray)
+    def scalar(dtype, value):
+        return float64(value)
+
+    pkl = tmp_path / "scalar_keys.pkl"
+    with pkl.open("wb") as f:
+        for i in range(100):
+            pickle.dump({"ID": i, float64(1.0): 0, float64(2.0): 0, float64(3.0): 0}, f)
+
+    s = columns.summarize_columns_from_rows(columns.iter_rows(pkl, max_rows=200))
+    assert s["total_columns"] == 4
+    assert s["numeric_named_columns_count"] == 3
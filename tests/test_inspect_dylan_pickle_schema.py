@@ -0,0 +1,66 @@
+import pickle
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import inspect_dylan_pickle_schema as schema  # noqa: E402
+
+
+def test_schema_records_shapes_without_rebuilding_arrays(tmp_path, stub_module, stub_global):
+    stub_module("numpy")
+    stub_module("numpy._core")
+    numeric = stub_module("numpy._core.numeric")
+    multiarray = stub_module("numpy._core.multiarray")
+    stub_module("torch")
+    utils = stub_module("torch._utils")
+    storage = stub_module("torch.storage")
+
+    @stub_global(numeric)
+    def _frombuffer(*args):
+        raise AssertionError("array payload was rebuilt")
+
+    @stub_global(multiarray)
+    def _reconstruct(*args):
+        raise AssertionError("array payload was rebuilt")
+
+    @stub_global(utils)
+    def _rebuild_tensor_v2(*args):
+        raise AssertionError("tensor payload was rebuilt")
+
+    @stub_global(storage)
+    def _load_from_bytes(data):
+        raise AssertionError("tensor storage was loaded")
+
+    class Protocol5Array:
+        def __reduce_ex__(self, protocol):
+            return _frombuffer, (pickle.PickleBuffer(bytearray(16)), "f4", (1, 4), "C")
+
+    class LegacyArray:
+        def __reduce__(self):
+            return _reconstruct, (0, (0,), b"b"), (1, (2, 4), "f4", False, b"\0" * 32)
+
+    class Storage:
+        def __reduce__(self):
+            return _load_from_bytes, (b"\0" * 16,)
+
+    class Tensor:
+        def __reduce__(self):
+            return _rebuild_tensor_v2, (Storage(), 0, (3, 4), (4, 1), False, {})
+
+    pkl = tmp_path / "embeddings.pkl"
+    with pkl.open("wb") as f:
+        for emb in [Protocol5Array(), LegacyArray(), Tensor()]:
+            pickle.dump({"ID": 1, "Embedding": {"36": emb}}, f, protocol=5)
+
+    rows = schema.read_rows(pkl, max_rows=10)
+    s = schema.summarize_rows(rows, id_samples=1, pathogenicity_samples=1)
+    assert sorted(s["embedding_36_shapes"]) == [("(1, 4)", 1), ("(2, 4)", 1), ("(3, 4)", 1)]
+    type_names = [schema.type_name(r["Embedding"]["36"]) for r in rows]
+    assert type_names == ["ndarray", "ndarray", "Tensor"]
+
+
+def test_key_name_keeps_equal_hashing_keys_apart():
+    cache: dict = {}
+    names = [schema.key_name(k, cache) for k in [1, 1.0, True, "a", 1]]
+    assert names == ["1", "1.0", "True", "a", "1"]
@@ -0,0 +1,221 @@
+import csv
+import gzip
+import io
+import pickle
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import make_pickle_id_to_chrposrefalt as m  # noqa: E402
+
+COLUMNS = [
+    "#AlleleID",
+    "Type",
+    "Name",
+    "Assembly",
+    "Chromosome",
+    "VariationID",
+    "PositionVCF",
+    "ReferenceAlleleVCF",
+    "AlternateAlleleVCF",
+    "ReviewStatus",
+]
+
+# (VariationID, Assembly, Chromosome, PositionVCF, ReferenceAlleleVCF, AlternateAlleleVCF)
+CLINVAR_ROWS = [
+    ("1", "GRCh38", "1", "100", "A", "G"),  # unique
+    ("1", "GRCh37", "1", "90", "A", "G"),  # other assembly
+    ("2", "GRCh38", "X", "200", "c", "t"),  # lowercase alleles
+    ("2", "GRCh38", "X", "200", "C", "T"),  # same key again
+    ("3", "GRCh38", "2", "300", "G", "A"),  # ambiguous: two keys
+    ("3", "GRCh38", "2", "301", "G", "C"),
+    ("3", "GRCh38", "2", "300", "G", "A"),
+    ("4", "GRCh38", "MT", "na", "A", "C"),  # missing position
+    ("5", "GRCh38", "3", "-1", "A", "C"),  # non-digit position
+    ("6", "GRCh38", "4", "400", "AT", "A"),  # indel
+    ("7", "GRCh38", "NA", "500", "A", "C"),  # missing chromosome
+    ("8", "", "5", "600", "T", "G"),  # empty assembly is kept
+    ("9", "GRCh38", "6", "700", "A", "C"),  # not in the pickle
+    ("10", "na", "7", "800", " A ", "C"),  # padded allele
+]
+
+
+def _reference_mapping(pkl_path: Path, clinvar_path: Path, assembly: str):
+    """Pre-optimization mapping logic (csv.DictReader + dict-of-tuples), kept as the oracle."""
+
+    def is_snv(allele):
+        a = (allele or "").strip().upper()
+        return len(a) == 1 and a in {"A", "C", "G", "T"}
+
+    def is_missing(value):
+        return (value or "").strip().lower() in {"", "na", "n/a", "nan", "none"}
+
+    ids = set()
+    with pkl_path.open("rb") as f:
+        while True:
+            try:
+                obj = pickle.load(f)
+            except EOFError:
+                break
+            if isinstance(obj, dict) and "ID" in obj:
+                try:
+                    ids.add(int(obj["ID"]))
+                except Exception:
+                    continue
+
+    candidates = {}
+    seen_rows = 0
+    with gzip.open(clinvar_path, "rt", newline="") as gz:
+        for row in csv.DictReader(gz, delimiter="\t"):
+            seen_rows += 1
+            try:
+                variation_id = int(row["VariationID"])
+            except Exception:
+                continue
+            if variation_id not in ids:
+                continue
+            asm = (row.get("Assembly") or "").strip()
+            if assembly and asm and asm != assembly:
+                continue
+            chrom = (row.get("Chromosome") or "").strip()
+            pos = (row.get("PositionVCF") or "").strip()
+            ref = (row.get("ReferenceAlleleVCF") or "").strip()
+            alt = (row.get("AlternateAlleleVCF") or "").strip()
+            if is_missing(chrom) or is_missing(pos) or is_missing(ref) or is_missing(alt):
+                continue
+            if not pos.isdigit() or not (is_snv(ref) and is_snv(alt)):
+                continue
+            key = f"{chrom}_{pos}_{ref.upper()}_{alt.upper()}"
+            candidates.setdefault(variation_id, {})[key] = (chrom, pos, ref.upper(), alt.upper())
+
+    unique, ambiguous = [], []
+    for variation_id, key_map in sorted(candidates.items()):
+        if len(key_map) == 1:
+            ((key, fields),) = key_map.items()
+            unique.append([str(variation_id), *fields, key])
+        else:
+            for key, fields in sorted(key_map.items()):
+                ambiguous.append([str(variation_id), *fields, key, str(len(key_map))])
+    return seen_rows, unique, ambiguous
+
+
+def _write_fixture(tmp_path: Path, newline: str, columns: list[str]) -> tuple[Path, Path]:
+    clinvar_path = tmp_path / "variant_summary.txt.gz"
+    lines = ["\t".join(columns)]
+    for i, (vid, asm, chrom, pos, ref, alt) in enumerate(CLINVAR_ROWS):
+        values = dict(zip(COLUMNS, [str(i), "snv", f"v{i}", asm, chrom, vid, pos, ref, alt, "x"]))
+        lines.append("\t".join(values[c] for c in columns))
+        if i == 3:
+            lines.append("")  # blank line: not a ClinVar row
+    if columns[-1] != "VariationID":
+        # Truncated right after a matching VariationID, before the VCF columns
+        truncated = ["99", "snv", "short", "GRCh38", "1", "1", "100", "A", "G", "x"]
+        lines.append("\t".join(truncated[: columns.index("VariationID") + 1]))
+    with gzip.open(clinvar_path, "wb") as gz:
+        gz.write((newline.join(lines) + newline).encode())
+
+    pkl_path = tmp_path / "rows.pkl"
+    with pkl_path.open("wb") as f:
+        for pid in [1, 2, 3, "3", 4, 5, 6, 7, 8, 10, "not-an-id", None]:
+            pickle.dump({"ID": pid, "Embedding": None}, f)
+        pickle.dump(["not", "a", "dict"], f)
+    return pkl_path, clinvar_path
+
+
+def _read_tsv(path: Path) -> list[list[str]]:
+    with path.open(newline="") as f:
+        return list(csv.reader(f, delimiter="\t"))
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 3, 5, 8, 64])
+def test_iter_line_blocks_splits_only_at_line_ends(block_size):
+    data = b"a\tb\r\n\nccc\tdd\nlast-without-newline"
+    blocks = list(m._iter_line_blocks(io.BytesIO(data), block_size))
+    assert b"".join(blocks) == data
+    assert all(block.endswith(b"\n") for block in blocks[:-1])
+
+
+def test_iter_line_blocks_empty_stream():
+    assert list(m._iter_line_blocks(io.BytesIO(b""), 4)) == []
+
+
+def test_scan_block_counts_lines_and_matches_id_column():
+    block = b"0\t1\r\n1\t22\n\n2\n3\t1\t9"
+    n_lines, hits = m._scan_block(block, 1, {b"1", b"22"})
+    assert n_lines == 4  # the blank line is not a row, as in the DictReader baseline
+    assert hits == [b"0\t1", b"1\t22", b"3\t1\t9"]
+
+
+def test_missing_tokens_match_case_insensitive_baseline():
+    for token in ["", "NA", "nA", "N/a", "NaN", "nan", "NONE", "None"]:
+        assert m._is_missing(token.encode())
+    for token in ["1", "X", "MT", "A", "nonee", "n/aa"]:
+        assert not m._is_missing(token.encode())
+
+
+def _run_main(monkeypatch, pkl_path, clinvar_path, out_path, amb_path, *extra):
+    argv = [
+        "make_pickle_id_to_chrposrefalt.py",
+        "--pickle", str(pkl_path),
+        "--clinvar", str(clinvar_path),
+        "--out", str(out_path),
+        "--ambiguous-out", str(amb_path),
+        *extra,
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    m.main()
+
+
+@pytest.mark.parametrize(
+    "content, missing",
+    [
+        (b"", "VariationID, Assembly, Chromosome, PositionVCF"),
+        (b"#AlleleID\tVariationID\tAssembly\tChrom", "Chromosome, PositionVCF"),
+    ],
+)
+def test_missing_clinvar_columns_exit_with_file_and_names(tmp_path, monkeypatch, content, missing):
+    pkl_path, _ = _write_fixture(tmp_path, "\n", COLUMNS)
+    clinvar_path = tmp_path / "broken.txt.gz"
+    with gzip.open(clinvar_path, "wb") as gz:
+        gz.write(content)
+
+    with pytest.raises(SystemExit) as exc:
+        _run_main(monkeypatch, pkl_path, clinvar_path, tmp_path / "o.tsv", tmp_path / "a.tsv")
+    assert str(clinvar_path) in str(exc.value)
+    assert missing in str(exc.value)
+
+
+@pytest.mark.parametrize("workers", ["0", "-2", "two"])
+def test_workers_below_one_are_rejected(monkeypatch, capsys, workers):
+    monkeypatch.setattr(sys, "argv", ["make_pickle_id_to_chrposrefalt.py", "--workers", workers])
+    with pytest.raises(SystemExit) as exc:
+        m.parse_args()
+    assert exc.value.code == 2
+    assert "--workers" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+@pytest.mark.parametrize("vid_last", [False, True])
+@pytest.mark.parametrize("assembly", ["GRCh38", ""])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_mapping_matches_reference(
+    tmp_path, monkeypatch, capsys, newline, vid_last, assembly, workers
+):
+    columns = [c for c in COLUMNS if c != "VariationID"] + ["VariationID"] if vid_last else COLUMNS
+    pkl_path, clinvar_path = _write_fixture(tmp_path, newline, columns)
+    out_path = tmp_path / "out.tsv"
+    amb_path = tmp_path / "amb.tsv"
+    _run_main(
+        monkeypatch, pkl_path, clinvar_path, out_path, amb_path,
+        "--assembly", assembly, "--workers", str(workers),
+    )
+
+    seen_rows, unique, ambiguous = _reference_mapping(pkl_path, clinvar_path, assembly)
+    assert f"ClinVar rows scanned: {seen_rows}\n" in capsys.readouterr().out
+    assert unique and ambiguous
+    assert _read_tsv(out_path) == [list(m.HEADER), *unique]
+    assert _read_tsv(amb_path) == [list(m.AMB_HEADER), *ambiguous]
+    assert b"\r" not in out_path.read_bytes()
@@ -0,0 +1,24 @@
+import pytest
+
+from variant_embeddings.pickle_inspection.payload_globals import PAYLOAD_GLOBALS, payload_stubs
+
+
+def _stub(*args):
+    return args
+
+
+def test_payload_stubs_cover_every_payload_global():
+    kinds = set(PAYLOAD_GLOBALS.values()) - {"from_type"}
+    table = payload_stubs({kind: _stub for kind in kinds})
+    assert table.keys() == PAYLOAD_GLOBALS.keys()
+
+    # Tensor subclasses defer to the (stubbed) inner rebuild call.
+    rebuild_from_type = table[("torch._utils", "_rebuild_from_type_v2")]
+    assert rebuild_from_type(_stub, object, (1, 2), None) == (1, 2)
+
+
+def test_payload_stubs_reject_a_missing_kind():
+    with pytest.raises(ValueError, match="storage"):
+        payload_stubs(
+            {"reconstruct": _stub, "frombuffer": _stub, "tensor": _stub, "parameter": _stub}
+        )
@@ -0,0 +1,95 @@
+import json
+import os
+import pickle
+import sys
+from pathlib import Path
+
+import pytest
+
+from variant_embeddings.pickle_inspection.schema_cache import (
+    load_schema_cache,
+    pickle_fingerprint,
+    write_schema_cache,
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import inspect_dylan_pickle_columns as columns  # noqa: E402
+import inspect_dylan_pickle_schema as schema  # noqa: E402
+
+
+def _write_pickle(path: Path, n_rows: int, column: str) -> Path:
+    with path.open("wb") as f:
+        for i in range(n_rows):
+            pickle.dump({"ID": i, column: None}, f)
+    return path
+
+
+def _run(module, monkeypatch, capsys, pkl_path: Path, cache_path: Path) -> str:
+    argv = [module.__name__, "--path", str(pkl_path), "--schema-cache", str(cache_path)]
+    monkeypatch.setattr(sys, "argv", argv)
+    module.main()
+    return capsys.readouterr().out
+
+
+def test_cache_round_trip_requires_identical_params(tmp_path):
+    pkl = _write_pickle(tmp_path / "rows.pkl", 3, "A_col")
+    cache = tmp_path / "nested" / "cache.json"
+    params = {"max_rows": 10, **pickle_fingerprint(pkl)}
+
+    write_schema_cache(cache, params, {"rows_sampled": 3})
+    assert load_schema_cache(cache, params) == {"rows_sampled": 3}
+    assert load_schema_cache(cache, {**params, "max_rows": 11}) is None
+    assert load_schema_cache(tmp_path / "absent.json", params) is None
+
+
+@pytest.mark.parametrize(
+    "content",
+    ["[]", "null", "42", '"text"', "{not json", '{"params": {}, "summary": []}'],
+)
+def test_foreign_cache_content_is_a_miss(tmp_path, content):
+    cache = tmp_path / "cache.json"
+    cache.write_text(content)
+    assert load_schema_cache(cache, {}) is None
+
+
+@pytest.mark.parametrize("module", [columns, schema])
+def test_schema_cache_is_keyed_on_the_inspected_pickle(module, tmp_path, monkeypatch, capsys):
+    a = _write_pickle(tmp_path / "a.pkl", 3, "A_col")
+    b = _write_pickle(tmp_path / "b.pkl", 5, "B_col")
+    cache = tmp_path / "cache.json"
+
+    out_a = _run(module, monkeypatch, capsys, a, cache)
+    assert "Rows sampled: 3" in out_a and "A_col" in out_a
+
+    out_b = _run(module, monkeypatch, capsys, b, cache)
+    assert "=== b.pkl ===" in out_b
+    assert "Rows sampled: 5" in out_b and "B_col" in out_b and "A_col" not in out_b
+
+
+@pytest.mark.parametrize("module", [columns, schema])
+def test_schema_cache_reused_only_while_pickle_unchanged(module, tmp_path, monkeypatch, capsys):
+    pkl = _write_pickle(tmp_path / "rows.pkl", 3, "A_col")
+    cache = tmp_path / "cache.json"
+    _run(module, monkeypatch, capsys, pkl, cache)
+
+    # Unchanged pickle: the (tampered) cached summary is what gets printed.
+    payload = json.loads(cache.read_text())
+    payload["summary"]["rows_sampled"] = 999
+    cache.write_text(json.dumps(payload))
+    assert "Rows sampled: 999" in _run(module, monkeypatch, capsys, pkl, cache)
+
+    # Replaced by an older-dated copy (cp -p / rsync -t): the cache must not be used.
+    _write_pickle(pkl, 4, "B_col")
+    os.utime(pkl, ns=(1_000_000_000, 1_000_000_000))
+    out = _run(module, monkeypatch, capsys, pkl, cache)
+    assert "Rows sampled: 4" in out and "B_col" in out
+
+
+@pytest.mark.parametrize("module", [columns, schema])
+def test_non_object_cache_file_is_rebuilt(module, tmp_path, monkeypatch, capsys):
+    pkl = _write_pickle(tmp_path / "rows.pkl", 3, "A_col")
+    cache = tmp_path / "cache.json"
+    cache.write_text("[]")
+    assert "Rows sampled: 3" in _run(module, monkeypatch, capsys, pkl, cache)
+    assert json.loads(cache.read_text())["summary"]["rows_sampled"] == 3